@@ -10,15 +10,19 @@ class Settings(BaseSettings):
     DATA_DIR: Path = BASE_DIR / "data"
     DATABASE_PATH: Path = DATA_DIR / "dictionary.db"
     CHROMA_PATH: Path = DATA_DIR / "chroma"
+    DB_POOL_SIZE: int = 8  # SQLite connections shared between requests
 
     # API
     API_PREFIX: str = "/api"
     DEBUG: bool = True
+    THREAD_POOL_SIZE: int = 200  # Worker threads for sync endpoints
 
     # LLM Server (GPU)
     LLM_SERVER_URL: str = "http://localhost:11434"  # Ollama default
     LLM_MODEL: str = "mistral:7b"
     LLM_TIMEOUT: int = 30
+    LLM_CACHE_SIZE: int = 4096  # Cached LLM translations
+    LLM_HEALTH_TTL: int = 5  # Seconds to reuse an LLM availability check
 
     # Vector search
     EMBEDDING_MODEL: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
@@ -26,6 +30,8 @@ class Settings(BaseSettings):
     # Translation
     MAX_TEXT_LENGTH: int = 5000
     FUZZY_THRESHOLD: int = 2  # Levenshtein distance
+    WORD_CACHE_TTL: int = 300  # Seconds before the in-memory word list is reloaded
+    WORD_TRANSLATION_CACHE_SIZE: int = 50000  # Memoized per-word translations
 
     class Config:
         env_file = ".env"
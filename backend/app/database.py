@@ -1,11 +1,31 @@
+import queue
 import sqlite3
+import threading
 from pathlib import Path
 from contextlib import contextmanager
-from typing import Generator
+from functools import lru_cache
+from typing import Generator, Optional
 
 from app.config import settings
 
 
+# Character replacements applied by normalize_word
+_NORMALIZE_TABLE = str.maketrans({
+    "ё": "е",
+    "Ё": "е",
+    # Palochka is often typed as Latin I or the uppercase letter
+    "I": "ӏ",
+    "Ӏ": "ӏ",
+    # Stress marks
+    "\u0300": None,
+    "\u0301": None,
+})
+
+# Shared connections, created lazily by get_db()
+_pool: Optional[queue.Queue] = None
+_pool_lock = threading.Lock()
+
+
 def init_db():
     """Initialize the database with required tables"""
     with get_db() as conn:
@@ -16,7 +36,7 @@ def init_db():
             CREATE TABLE IF NOT EXISTS words (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 word TEXT NOT NULL,
-                word_normalized TEXT,
+                word_normalized TEXT NOT NULL DEFAULT '',
                 root TEXT,
                 part_of_speech TEXT,
                 is_verified BOOLEAN DEFAULT 0,
@@ -24,6 +44,18 @@ def init_db():
             )
         """)
 
+        # Fill in normalized forms that are missing or were produced by
+        # older normalization rules
+        cursor.execute("SELECT id, word, word_normalized FROM words")
+        cursor.executemany(
+            "UPDATE words SET word_normalized = ? WHERE id = ?",
+            [
+                (normalize_word(row['word']), row['id'])
+                for row in cursor.fetchall()
+                if row['word_normalized'] != normalize_word(row['word'])
+            ]
+        )
+
         # Translations table (Russian translations)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS translations (
@@ -59,30 +91,153 @@ def init_db():
             )
         """)
 
+        # Full-text index over translations (kept in sync by triggers)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'translations_fts'")
+        fts_exists = cursor.fetchone() is not None
+
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS translations_fts USING fts5(
+                translation,
+                content='translations',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS translations_fts_insert AFTER INSERT ON translations BEGIN
+                INSERT INTO translations_fts(rowid, translation) VALUES (new.id, new.translation);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS translations_fts_delete AFTER DELETE ON translations BEGIN
+                INSERT INTO translations_fts(translations_fts, rowid, translation)
+                VALUES ('delete', old.id, old.translation);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS translations_fts_update AFTER UPDATE ON translations BEGIN
+                INSERT INTO translations_fts(translations_fts, rowid, translation)
+                VALUES ('delete', old.id, old.translation);
+                INSERT INTO translations_fts(rowid, translation) VALUES (new.id, new.translation);
+            END
+        """)
+
+        # Index translations that existed before the FTS table
+        if not fts_exists:
+            cursor.execute("INSERT INTO translations_fts(translations_fts) VALUES ('rebuild')")
+
         # Create indexes for fast search
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_word ON words(word)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_word_normalized ON words(word_normalized)")
+        # Superseded by idx_word_cover, which starts with word_normalized
+        cursor.execute("DROP INDEX IF EXISTS idx_word_normalized")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_root ON words(root)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_translation ON translations(translation)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_morpheme ON morphemes(morpheme)")
 
+        # One row per (word, translation). Drop duplicates left by older
+        # imports before the unique index is first created.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_trans_word_text'")
+        if cursor.fetchone() is None:
+            cursor.execute("""
+                DELETE FROM translations WHERE id NOT IN (
+                    SELECT MIN(id) FROM translations GROUP BY word_id, translation
+                )
+            """)
+            cursor.execute("""
+                CREATE UNIQUE INDEX ux_trans_word_text ON translations(word_id, translation)
+            """)
+
+        # Covering index: exact lookups by normalized form never touch the table
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_word_cover
+            ON words(word_normalized, word, root, part_of_speech, is_verified)
+        """)
+
+        # Refresh planner statistics where SQLite thinks they are stale
+        cursor.execute("PRAGMA optimize")
+
         conn.commit()
 
 
+def _connect() -> sqlite3.Connection:
+    """Open a connection tuned for concurrent reads"""
+    # Larger statement cache: each pooled connection parses a query text once
+    conn = sqlite3.connect(
+        settings.DATABASE_PATH,
+        check_same_thread=False,
+        cached_statements=256
+    )
+    conn.row_factory = sqlite3.Row
+    # WAL lets readers proceed while a writer is active
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")  # 64 MB
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    return conn
+
+
+def _get_pool() -> queue.Queue:
+    """Create the connection pool on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = queue.Queue(maxsize=settings.DB_POOL_SIZE)
+                for _ in range(settings.DB_POOL_SIZE):
+                    pool.put(_connect())
+                _pool = pool
+    return _pool
+
+
 @contextmanager
 def get_db() -> Generator[sqlite3.Connection, None, None]:
-    """Get database connection as context manager"""
-    conn = sqlite3.connect(settings.DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    """Get pooled database connection as context manager"""
+    pool = _get_pool()
+    conn = pool.get()
     try:
         yield conn
     finally:
-        conn.close()
+        # Don't hand an unfinished transaction to the next user
+        if conn.in_transaction:
+            conn.rollback()
+        pool.put(conn)
 
 
+@contextmanager
+def bulk_load() -> Generator[sqlite3.Connection, None, None]:
+    """
+    Get pooled connection for a large import, committed as one transaction.
+
+    Skips fsyncs for the duration of the load; a crash only loses the import.
+    """
+    with get_db() as conn:
+        conn.execute("PRAGMA synchronous=OFF")
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            # Can only be changed outside a transaction, hence after commit/rollback
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+
+@lru_cache(maxsize=8192)
 def normalize_word(word: str) -> str:
     """Normalize word for search (lowercase, remove accents)"""
+    return normalize_text(word)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize like normalize_word, without caching.
+
+    Use for arbitrary user text so it doesn't evict dictionary words
+    from normalize_word's cache.
+    """
     # Remove common diacritics and normalize
-    word = word.lower().strip()
+    text = text.translate(_NORMALIZE_TABLE).lower().strip()
     # Add more normalization rules as needed for Tabasaran
-    return word
+    return text
@@ -1,5 +1,7 @@
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.config import settings
 from app.database import init_db
@@ -8,13 +10,21 @@ from app.routers import translate, dictionary
 from app.services.llm_client import llm_client
 
 
+# orjson speeds up responses on older FastAPI; newer releases serialize
+# response models to JSON themselves and deprecate ORJSONResponse
+_response_class_kwargs = (
+    {} if getattr(ORJSONResponse, "__deprecated__", None)
+    else {"default_response_class": ORJSONResponse}
+)
+
 # Create FastAPI app
 app = FastAPI(
     title="Tabasaran-Russian Translator",
     description="API для перевода между табасаранским и русским языками",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    **_response_class_kwargs
 )
 
 # CORS middleware
@@ -34,10 +44,19 @@ app.include_router(dictionary.router, prefix=settings.API_PREFIX)
 @app.on_event("startup")
 async def startup():
     """Initialize database on startup"""
+    # Sync (def) endpoints run in this thread pool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREAD_POOL_SIZE
+
     init_db()
     print(f"Database initialized at {settings.DATABASE_PATH}")
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Close connections to the LLM server"""
+    await llm_client.aclose()
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint"""
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/dictionary", tags=["Dictionary"])
 
 
 @router.get("/lookup/{word}", response_model=LookupResponse)
-async def lookup_word(
+def lookup_word(
     word: str,
     fuzzy: bool = Query(True, description="Allow fuzzy matching")
 ):
@@ -35,7 +35,7 @@ async def lookup_word(
 
 
 @router.get("/suggest", response_model=SuggestResponse)
-async def suggest_words(
+def suggest_words(
     q: str = Query(..., min_length=1, description="Query prefix"),
     limit: int = Query(10, ge=1, le=50, description="Max suggestions")
 ):
@@ -54,7 +54,7 @@ async def suggest_words(
 
 
 @router.get("/word/{word_id}", response_model=DictionaryEntry)
-async def get_word(word_id: int):
+def get_word(word_id: int):
     """
     Get detailed information about a word by ID.
 
@@ -69,7 +69,7 @@ async def get_word(word_id: int):
 
 
 @router.get("/search/russian", response_model=LookupResponse)
-async def search_by_russian(
+def search_by_russian(
     word: str = Query(..., min_length=1, description="Russian word to search")
 ):
     """
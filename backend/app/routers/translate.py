@@ -1,6 +1,10 @@
+import json
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
 from app.models import TranslateRequest, TranslateResponse
+from app.services.llm_client import LLMError
 from app.services.translator import translator_service
 
 
@@ -21,3 +25,23 @@ async def translate_text(request: TranslateRequest):
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/stream")
+async def translate_text_stream(request: TranslateRequest):
+    """
+    Translate text, streaming the translation as server-sent events.
+
+    Each event's data is a JSON-encoded chunk of the translated text.
+    If the LLM stops partway, a final "error" event tells the client
+    that the text received so far is incomplete.
+    Takes the same parameters as the regular translate endpoint.
+    """
+    async def events():
+        try:
+            async for chunk in translator_service.translate_stream(request):
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        except LLMError as e:
+            yield f"event: error\ndata: {json.dumps(str(e), ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
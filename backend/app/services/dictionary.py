@@ -1,15 +1,41 @@
+import heapq
 import sqlite3
-from typing import List, Optional, Tuple
-import Levenshtein
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
 
 from app.database import get_db, normalize_word
 from app.models import DictionaryEntry
 from app.config import settings
 
 
+# Stay below SQLite's default limit on bound parameters per statement
+SQLITE_MAX_PARAMS = 900
+
+
 class DictionaryService:
     """Service for dictionary lookups"""
 
+    def __init__(self):
+        # In-memory word ids and normalized words (parallel lists),
+        # bucketed by word length
+        self._by_length: Dict[int, Tuple[List[int], List[str]]] = {}
+        # (normalized, word) pairs sorted for prefix search
+        self._sorted_words: List[Tuple[str, str]] = []
+        self._cache_loaded_at: Optional[float] = None
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
+
+    @property
+    def cache_generation(self) -> int:
+        """Counter that changes whenever the cached word list is reloaded"""
+        self._get_word_cache()
+        return self._cache_generation
+
     def lookup_exact(self, word: str) -> List[DictionaryEntry]:
         """Find exact match for a word"""
         normalized = normalize_word(word)
@@ -17,45 +43,108 @@ class DictionaryService:
         with get_db() as conn:
             cursor = conn.cursor()
 
-            # Try exact match first
+            # word_normalized is always set, so this covers exact spelling too
             cursor.execute("""
                 SELECT w.id, w.word, w.word_normalized, w.root, w.part_of_speech, w.is_verified
                 FROM words w
-                WHERE w.word = ? OR w.word_normalized = ?
-            """, (word, normalized))
+                WHERE w.word_normalized = ?
+            """, (normalized,))
 
             rows = cursor.fetchall()
-            return [self._row_to_entry(conn, row) for row in rows]
+            return self._rows_to_entries(conn, rows)
+
+    def lookup_exact_many(self, words: List[str]) -> Dict[str, List[DictionaryEntry]]:
+        """Find exact matches for many words at once, keyed by the given word"""
+        normalized = {word: normalize_word(word) for word in words}
+        matches: Dict[str, List[DictionaryEntry]] = {}
+
+        with get_db() as conn:
+            cursor = conn.cursor()
 
-    def lookup_fuzzy(self, word: str, max_distance: int = None) -> List[Tuple[DictionaryEntry, int]]:
-        """Find fuzzy matches using Levenshtein distance"""
+            for chunk in _chunks(list(set(normalized.values()))):
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"""
+                    SELECT w.id, w.word, w.word_normalized, w.root, w.part_of_speech, w.is_verified
+                    FROM words w
+                    WHERE w.word_normalized IN ({placeholders})
+                """, chunk)
+
+                for entry in self._rows_to_entries(conn, cursor.fetchall()):
+                    matches.setdefault(entry.word_normalized, []).append(entry)
+
+        return {word: matches.get(key, []) for word, key in normalized.items()}
+
+    def lookup_fuzzy(
+        self,
+        word: str,
+        max_distance: int = None,
+        limit: int = 10
+    ) -> List[Tuple[DictionaryEntry, int]]:
+        """Find up to limit fuzzy matches using Levenshtein distance"""
         if max_distance is None:
             max_distance = settings.FUZZY_THRESHOLD
 
         normalized = normalize_word(word)
-        results = []
+        by_length, _ = self._get_word_cache()
+
+        # Edit distance is at least the length difference, so only words
+        # within max_distance characters of the query length can match.
+        # Scan the closest lengths first and tighten the cutoff once limit
+        # matches are found, so far buckets are usually skipped entirely.
+        length = len(normalized)
+        lengths = sorted(
+            range(max(length - max_distance, 0), length + max_distance + 1),
+            key=lambda candidate_length: abs(candidate_length - length)
+        )
+
+        hits = []  # (distance, word_id)
+        cutoff = max_distance
+        for candidate_length in lengths:
+            if abs(candidate_length - length) > cutoff:
+                break
+
+            bucket_ids, bucket_words = by_length.get(candidate_length, ((), ()))
+            if not bucket_words:
+                continue
+
+            # Distances above the cutoff come back as cutoff + 1. Threads
+            # only pay off for larger buckets.
+            distances = process.cdist(
+                [normalized],
+                bucket_words,
+                scorer=Levenshtein.distance,
+                score_cutoff=cutoff,
+                workers=1 if len(bucket_words) < 100 else -1
+            )[0]
+            for index in np.flatnonzero((distances > 0) & (distances <= cutoff)):
+                hits.append((int(distances[index]), bucket_ids[index]))
+
+            if len(hits) >= limit:
+                hits = heapq.nsmallest(limit, hits)
+                # Anything else has to be at least as close as the worst kept match
+                cutoff = hits[-1][0]
+
+        if not hits:
+            return []
+
+        best = [(word_id, distance) for distance, word_id in heapq.nsmallest(limit, hits)]
 
         with get_db() as conn:
             cursor = conn.cursor()
 
-            # Get all words (for small dictionaries this is fine)
-            # For large dictionaries, use prefix filtering
-            cursor.execute("""
+            placeholders = ",".join("?" * len(best))
+            cursor.execute(f"""
                 SELECT w.id, w.word, w.word_normalized, w.root, w.part_of_speech, w.is_verified
                 FROM words w
-            """)
-
-            for row in cursor.fetchall():
-                db_word = row['word_normalized'] or row['word']
-                distance = Levenshtein.distance(normalized, db_word.lower())
-
-                if distance <= max_distance and distance > 0:
-                    entry = self._row_to_entry(conn, row)
-                    results.append((entry, distance))
+                WHERE w.id IN ({placeholders})
+            """, [word_id for word_id, _ in best])
 
-        # Sort by distance
-        results.sort(key=lambda x: x[1])
-        return results[:10]  # Limit to 10 results
+            entries = {entry.id: entry for entry in self._rows_to_entries(conn, cursor.fetchall())}
+            return [
+                (entries[word_id], distance)
+                for word_id, distance in best
+                if word_id in entries
+            ]
 
     def lookup_by_root(self, root: str) -> List[DictionaryEntry]:
         """Find words by root"""
@@ -69,24 +158,23 @@ class DictionaryService:
             """, (root,))
 
             rows = cursor.fetchall()
-            return [self._row_to_entry(conn, row) for row in rows]
+            return self._rows_to_entries(conn, rows)
 
     def suggest(self, prefix: str, limit: int = 10) -> List[str]:
         """Get word suggestions for autocomplete"""
         normalized = normalize_word(prefix)
+        _, sorted_words = self._get_word_cache()
 
-        with get_db() as conn:
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT DISTINCT word
-                FROM words
-                WHERE word_normalized LIKE ? OR word LIKE ?
-                ORDER BY word
-                LIMIT ?
-            """, (f"{normalized}%", f"{prefix}%", limit))
+        # Words sharing the prefix form a contiguous run in the sorted list
+        suggestions = []
+        for i in range(bisect_left(sorted_words, (normalized,)), len(sorted_words)):
+            word_normalized, word = sorted_words[i]
+            if not word_normalized.startswith(normalized) or len(suggestions) >= limit:
+                break
+            if word not in suggestions:
+                suggestions.append(word)
 
-            return [row['word'] for row in cursor.fetchall()]
+        return suggestions
 
     def get_by_id(self, word_id: int) -> Optional[DictionaryEntry]:
         """Get word by ID"""
@@ -101,57 +189,122 @@ class DictionaryService:
 
             row = cursor.fetchone()
             if row:
-                return self._row_to_entry(conn, row)
+                return self._rows_to_entries(conn, [row])[0]
             return None
 
     def search_russian(self, russian_word: str) -> List[DictionaryEntry]:
         """Search by Russian translation (for reverse translation)"""
+        query = _fts_prefix_query(russian_word)
+        if not query:
+            return []
+
         with get_db() as conn:
             cursor = conn.cursor()
 
+            # Prefix search over the full-text index, best bm25 rank first
             cursor.execute("""
-                SELECT DISTINCT w.id, w.word, w.word_normalized, w.root, w.part_of_speech, w.is_verified
-                FROM words w
-                JOIN translations t ON w.id = t.word_id
-                WHERE t.translation LIKE ?
-                ORDER BY t.priority DESC
-            """, (f"%{russian_word}%",))
+                SELECT w.id, w.word, w.word_normalized, w.root, w.part_of_speech, w.is_verified
+                FROM translations_fts f
+                JOIN translations t ON t.id = f.rowid
+                JOIN words w ON w.id = t.word_id
+                WHERE translations_fts MATCH ?
+                GROUP BY w.id
+                ORDER BY MIN(f.rank), MAX(t.priority) DESC
+            """, (query,))
 
             rows = cursor.fetchall()
-            return [self._row_to_entry(conn, row) for row in rows]
+            return self._rows_to_entries(conn, rows)
+
+    def _get_word_cache(self) -> Tuple[Dict[int, Tuple[List[int], List[str]]], List[Tuple[str, str]]]:
+        """
+        Return cached words bucketed by length and sorted (normalized, word) pairs.
+
+        Words are written by the import scripts in a separate process, so the
+        list is only reloaded after WORD_CACHE_TTL seconds: fuzzy lookup,
+        suggestions and memoized word translations may miss newly imported
+        words until then.
+        """
+        with self._cache_lock:
+            now = time.monotonic()
+            if self._cache_loaded_at is None or now - self._cache_loaded_at > settings.WORD_CACHE_TTL:
+                with get_db() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT id, word, word_normalized FROM words ORDER BY id")
+                    rows = cursor.fetchall()
+
+                by_length = {}
+                sorted_words = []
+                for row in rows:
+                    word_normalized = row['word_normalized']
+                    bucket_ids, bucket_words = by_length.setdefault(len(word_normalized), ([], []))
+                    bucket_ids.append(row['id'])
+                    bucket_words.append(word_normalized)
+                    sorted_words.append((word_normalized, row['word']))
+                sorted_words.sort()
+
+                self._by_length = by_length
+                self._sorted_words = sorted_words
+                self._cache_loaded_at = now
+                self._cache_generation += 1
+
+            return self._by_length, self._sorted_words
+
+    def _rows_to_entries(self, conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> List[DictionaryEntry]:
+        """Convert database rows to DictionaryEntry objects"""
+        if not rows:
+            return []
 
-    def _row_to_entry(self, conn: sqlite3.Connection, row: sqlite3.Row) -> DictionaryEntry:
-        """Convert database row to DictionaryEntry"""
         cursor = conn.cursor()
-
-        # Get translations
-        cursor.execute("""
-            SELECT translation FROM translations
-            WHERE word_id = ?
-            ORDER BY priority DESC
-        """, (row['id'],))
-        translations = [r['translation'] for r in cursor.fetchall()]
-
-        # Get examples
-        cursor.execute("""
-            SELECT tabasaran_text, russian_text, source FROM examples
-            WHERE word_id = ?
-        """, (row['id'],))
-        examples = [
-            {"tabasaran": r['tabasaran_text'], "russian": r['russian_text'], "source": r['source']}
-            for r in cursor.fetchall()
+        ids = [row['id'] for row in rows]
+        translations = {word_id: [] for word_id in ids}
+        examples = {word_id: [] for word_id in ids}
+
+        # Fetch translations and examples for all rows at once
+        for chunk in _chunks(ids):
+            placeholders = ",".join("?" * len(chunk))
+
+            cursor.execute(f"""
+                SELECT word_id, translation FROM translations
+                WHERE word_id IN ({placeholders})
+                ORDER BY priority DESC
+            """, chunk)
+            for r in cursor.fetchall():
+                translations[r['word_id']].append(r['translation'])
+
+            cursor.execute(f"""
+                SELECT word_id, tabasaran_text, russian_text, source FROM examples
+                WHERE word_id IN ({placeholders})
+            """, chunk)
+            for r in cursor.fetchall():
+                examples[r['word_id']].append(
+                    {"tabasaran": r['tabasaran_text'], "russian": r['russian_text'], "source": r['source']}
+                )
+
+        return [
+            DictionaryEntry(
+                id=row['id'],
+                word=row['word'],
+                word_normalized=row['word_normalized'],
+                root=row['root'],
+                part_of_speech=row['part_of_speech'],
+                translations=translations[row['id']],
+                examples=examples[row['id']],
+                is_verified=bool(row['is_verified'])
+            )
+            for row in rows
         ]
 
-        return DictionaryEntry(
-            id=row['id'],
-            word=row['word'],
-            word_normalized=row['word_normalized'],
-            root=row['root'],
-            part_of_speech=row['part_of_speech'],
-            translations=translations,
-            examples=examples,
-            is_verified=bool(row['is_verified'])
-        )
+
+def _fts_prefix_query(text: str) -> str:
+    """Build an FTS5 query matching every term of text as a prefix"""
+    terms = ['"{}"*'.format(term.replace('"', '""')) for term in text.split()]
+    return " ".join(terms)
+
+
+def _chunks(items: list, size: int = SQLITE_MAX_PARAMS) -> Iterator[list]:
+    """Split a list into chunks that fit into SQLite's parameter limit"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
 
 # Singleton instance
@@ -3,43 +3,20 @@ LLM client for GPU server communication.
 Supports Ollama API format.
 """
 
+import asyncio
 import httpx
-from typing import Optional, List
-import json
+import orjson
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 
 from app.config import settings
+from app.database import normalize_text
 
 
-class LLMClient:
-    """Client for communicating with LLM server"""
-
-    def __init__(self):
-        self.base_url = settings.LLM_SERVER_URL
-        self.model = settings.LLM_MODEL
-        self.timeout = settings.LLM_TIMEOUT
-
-    async def translate(
-        self,
-        text: str,
-        context: List[dict],
-        direction: str = "tab-rus"
-    ) -> Optional[str]:
-        """
-        Translate text using LLM with dictionary context.
-
-        Args:
-            text: Text to translate
-            context: List of dictionary entries for context
-            direction: Translation direction (tab-rus or rus-tab)
-
-        Returns:
-            Translated text or None if failed
-        """
-        # Format context from dictionary
-        context_text = self._format_context(context)
-
-        if direction == "tab-rus":
-            prompt = f"""Ты - эксперт-переводчик табасаранского языка на русский.
+# Static prompt parts; the dictionary context and the text go in between
+_TAB_RUS_PREFIX = """Ты - эксперт-переводчик табасаранского языка на русский.
 
 ГРАММАТИКА ТАБАСАРАНСКОГО ЯЗЫКА:
 - Агглютинативный язык (суффиксы добавляются к корню)
@@ -57,7 +34,9 @@ class LLMClient:
 - -ъ — локатив (на поверхности)
 
 СЛОВАРНЫЙ КОНТЕКСТ:
-{context_text}
+"""
+
+_TAB_RUS_EXAMPLES = """
 
 ПРИМЕРЫ ПЕРЕВОДОВ:
 • "Узу школайиз шулу" → "Я иду в школу"
@@ -65,11 +44,9 @@ class LLMClient:
 • "Дада гъафну" → "Отец пришёл"
 
 Переведи на русский язык, сохраняя смысл:
-"{text}"
+"""
 
-Ответь ТОЛЬКО переводом, без пояснений."""
-        else:
-            prompt = f"""Ты - эксперт-переводчик русского языка на табасаранский.
+_RUS_TAB_PREFIX = """Ты - эксперт-переводчик русского языка на табасаранский.
 
 ГРАММАТИКА ТАБАСАРАНСКОГО ЯЗЫКА:
 - Агглютинативный язык (суффиксы добавляются к корню)
@@ -77,7 +54,9 @@ class LLMClient:
 - Глагол ставится в конце предложения
 
 СЛОВАРНЫЙ КОНТЕКСТ:
-{context_text}
+"""
+
+_RUS_TAB_EXAMPLES = """
 
 ПРИМЕРЫ ПЕРЕВОДОВ:
 • "Я иду в школу" → "Узу школайиз шулу"
@@ -85,61 +64,263 @@ class LLMClient:
 • "Отец пришёл" → "Дада гъафну"
 
 Переведи на табасаранский язык:
-"{text}"
+"""
+
+_PROMPT_TAIL = """
 
 Ответь ТОЛЬКО переводом, без пояснений."""
 
+_PROMPT_PLACEHOLDER = "__PROMPT__"
+
+
+class LLMError(Exception):
+    """LLM response broke off before it was complete"""
+
+
+class LLMClient:
+    """Client for communicating with LLM server"""
+
+    def __init__(self):
+        self.base_url = settings.LLM_SERVER_URL
+        self.model = settings.LLM_MODEL
+        self.timeout = settings.LLM_TIMEOUT
+        # Recent responses, most recently used last
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        # Request body serialized once; the prompt is spliced in per call
+        self._body_template = orjson.dumps({
+            "model": self.model,
+            "prompt": _PROMPT_PLACEHOLDER,
+            "stream": True,
+            "options": {
+                "temperature": 0.3,
+                "top_p": 0.9,
+            }
+        })
+        # Last availability check as (monotonic time, result)
+        self._avail_cache: Tuple[float, bool] = (float("-inf"), False)
+        # Translations in progress, by cache key
+        self._pending: Dict[tuple, asyncio.Future] = {}
+        # Shared client so connections to the LLM server are kept alive
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=40)
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def translate(
+        self,
+        text: str,
+        context_words: List[str],
+        context_translations: List[List[str]],
+        direction: str = "tab-rus"
+    ) -> Optional[str]:
+        """
+        Translate text using LLM with dictionary context.
+
+        Args:
+            text: Text to translate
+            context_words: Dictionary words for context
+            context_translations: Translations of each context word
+            direction: Translation direction (tab-rus or rus-tab)
+
+        Returns:
+            Translated text or None if failed
+        """
+        key = self._cache_key(text, context_words, context_translations, direction)
+
+        # Identical requests that arrive while one is running share its result
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._collect(
+                text, context_words, context_translations, direction
+            ))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+
+        # A caller going away must not cancel the request for the others
+        return await asyncio.shield(pending)
+
+    async def _collect(
+        self,
+        text: str,
+        context_words: List[str],
+        context_translations: List[List[str]],
+        direction: str
+    ) -> Optional[str]:
+        """Run a streamed translation to completion within the LLM timeout"""
+        async def join() -> str:
+            chunks = [chunk async for chunk in self.translate_stream(
+                text, context_words, context_translations, direction
+            )]
+            return "".join(chunks).strip()
+
+        try:
+            # The HTTP timeout only bounds the gap between streamed lines
+            return await asyncio.wait_for(join(), timeout=self.timeout) or None
+        except asyncio.TimeoutError:
+            print(f"LLM request timeout")
+        except LLMError:
+            pass
+        # A partial translation is worse than the word-by-word fallback
+        return None
+
+    async def translate_stream(
+        self,
+        text: str,
+        context_words: List[str],
+        context_translations: List[List[str]],
+        direction: str = "tab-rus"
+    ) -> AsyncIterator[str]:
+        """
+        Translate text using LLM, yielding chunks as they are generated.
+
+        Args:
+            text: Text to translate
+            context_words: Dictionary words for context
+            context_translations: Translations of each context word
+            direction: Translation direction (tab-rus or rus-tab)
+
+        Yields:
+            Pieces of the translated text; nothing if the request failed
+
+        Raises:
+            LLMError: The request failed after some text was already yielded
+        """
+        cache_key = self._cache_key(text, context_words, context_translations, direction)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            yield cached
+            return
+
+        # Format context from dictionary
+        context_text = _format_context(cache_key[3])
+
+        if direction == "tab-rus":
+            prompt = _TAB_RUS_PREFIX + context_text + _TAB_RUS_EXAMPLES + f'"{text}"' + _PROMPT_TAIL
+        else:
+            prompt = _RUS_TAB_PREFIX + context_text + _RUS_TAB_EXAMPLES + f'"{text}"' + _PROMPT_TAIL
+
+        chunks = []
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.3,
-                            "top_p": 0.9,
-                        }
-                    }
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get("response", "").strip()
-
-        except httpx.TimeoutException:
+            async for chunk in self._generate(prompt):
+                chunks.append(chunk)
+                yield chunk
+
+        except httpx.TimeoutException as e:
             print(f"LLM request timeout")
-        except httpx.ConnectError:
+            error = e
+        except httpx.ConnectError as e:
             print(f"Cannot connect to LLM server at {self.base_url}")
+            error = e
         except Exception as e:
             print(f"LLM request error: {e}")
+            error = e
+        else:
+            error = None
+            translation = "".join(chunks).strip()
+            if translation:
+                self._remember(cache_key, translation)
 
-        return None
+        # The caller has already seen part of the text; don't let it pass as complete
+        if error is not None and chunks:
+            raise LLMError("LLM response was interrupted") from error
+
+    async def _generate(self, prompt: str) -> AsyncIterator[str]:
+        """Stream response tokens for a prompt from the LLM server"""
+        body = self._body_template.replace(
+            orjson.dumps(_PROMPT_PLACEHOLDER), orjson.dumps(prompt), 1
+        )
+
+        async with self._get_client().stream(
+            "POST",
+            "/api/generate",
+            content=body,
+            headers={"Content-Type": "application/json"}
+        ) as response:
+            if response.status_code != 200:
+                raise LLMError(f"LLM server returned status {response.status_code}")
+
+            # Ollama sends one JSON object per line, the last one marked done
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = orjson.loads(line)
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    return
+
+        raise LLMError("LLM response ended before it was done")
 
     async def is_available(self) -> bool:
-        """Check if LLM server is available"""
+        """Check if LLM server is available (result cached for a few seconds)"""
+        now = time.monotonic()
+        checked_at, available = self._avail_cache
+        if now - checked_at < settings.LLM_HEALTH_TTL:
+            return available
+
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                return response.status_code == 200
+            response = await self._get_client().get("/api/tags", timeout=5)
+            available = response.status_code == 200
         except:
-            return False
-
-    def _format_context(self, context: List[dict]) -> str:
-        """Format dictionary entries as context for LLM"""
-        if not context:
-            return "Контекст из словаря отсутствует."
-
-        lines = []
-        for entry in context[:10]:  # Limit context size
-            word = entry.get("word", "")
-            translations = entry.get("translations", [])
-            if translations:
-                trans_str = ", ".join(translations[:3])
-                lines.append(f"• {word} — {trans_str}")
-
-        return "\n".join(lines) if lines else "Контекст из словаря отсутствует."
+            available = False
+
+        self._avail_cache = (now, available)
+        return available
+
+    def _cache_key(
+        self,
+        text: str,
+        context_words: List[str],
+        context_translations: List[List[str]],
+        direction: str
+    ) -> tuple:
+        """Same model, direction, text and context give the same translation"""
+        context_key = self._context_key(context_words, context_translations)
+        return (self.model, direction, normalize_text(text), context_key)
+
+    def _context_key(
+        self,
+        context_words: List[str],
+        context_translations: List[List[str]]
+    ) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+        """Reduce dictionary context to a hashable (word, translations) tuple"""
+        # Limit context size
+        return tuple(
+            (word, tuple(translations[:3]))
+            for word, translations in zip(context_words[:10], context_translations[:10])
+        )
+
+    def _remember(self, key: tuple, translation: str):
+        """Store a response, evicting the least recently used one"""
+        self._cache[key] = translation
+        self._cache.move_to_end(key)
+        if len(self._cache) > settings.LLM_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+
+@lru_cache(maxsize=1024)
+def _format_context(context: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> str:
+    """Format (word, translations) pairs as context for LLM"""
+    lines = [
+        f"• {word} — {', '.join(translations)}"
+        for word, translations in context
+        if translations
+    ]
+    return "\n".join(lines) if lines else "Контекст из словаря отсутствует."
 
 
 # Singleton instance
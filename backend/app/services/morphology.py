@@ -66,6 +66,8 @@ class MorphologyService:
     def __init__(self):
         self.suffixes = COMMON_SUFFIXES
         self.prefixes = COMMON_PREFIXES
+        # Longest suffixes are tried first; sort once instead of per word
+        self._suffixes_by_len = sorted(self.suffixes, key=lambda x: -len(x[0]))
 
     def analyze(self, word: str) -> MorphAnalysis:
         """Analyze morphological structure of a word"""
@@ -85,7 +87,7 @@ class MorphologyService:
                 break
 
         # Try to find suffixes (from the end)
-        for suffix, stype, meaning in sorted(self.suffixes, key=lambda x: -len(x[0])):
+        for suffix, stype, meaning in self._suffixes_by_len:
             if remaining.endswith(suffix) and len(remaining) > len(suffix):
                 found_suffixes.insert(0, MorphemeInfo(suffix, "suffix", meaning))
                 remaining = remaining[:-len(suffix)]
@@ -4,17 +4,39 @@ Combines dictionary lookup, morphological analysis, and LLM for translation.
 """
 
 import re
-from typing import List, Tuple
+import anyio.to_thread
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+from app.config import settings
 from app.models import (
     TranslateRequest, TranslateResponse, WordTranslation,
-    TranslationDirection
+    TranslationDirection, DictionaryEntry
 )
 from app.services.dictionary import dictionary_service
 from app.services.morphology import morphology_service
 from app.services.llm_client import llm_client
 
 
+# Split on whitespace, keeping punctuation as separate tokens
+_TOKEN_RE = re.compile(r'(\s+|[.,!?;:"\'\(\)\[\]{}])')
+_PUNCT_SET = frozenset('.,!?;:"\'()[]{}')
+# Whitespace before punctuation in assembled text
+_FIX_PUNCT_RE = re.compile(r'\s+([.,!?;:])')
+# Tokens without a single Cyrillic letter (numbers, Latin words) are kept as-is
+_CYRILLIC_RE = re.compile(r'[А-Яа-яЁёӀӏ]')
+# Shorter words only get an exact lookup, no morphology or fuzzy matching
+_MIN_ANALYZE_LENGTH = 2
+
+# Russian function words; Tabasaran expresses these with case endings
+# and suffixes, so there is no separate word to look up
+_RUSSIAN_STOPWORDS = frozenset([
+    "а", "без", "бы", "в", "во", "да", "для", "до", "же", "за", "и", "из",
+    "или", "к", "ко", "ли", "на", "над", "не", "ни", "но", "о", "об", "обо",
+    "от", "по", "под", "при", "про", "с", "со", "у", "через", "чтобы",
+])
+
+
 class TranslatorService:
     """Main translation service"""
 
@@ -22,6 +44,10 @@ class TranslatorService:
         self.dictionary = dictionary_service
         self.morphology = morphology_service
         self.llm = llm_client
+        # Word translations keyed by (casefolded word, direction),
+        # valid for one dictionary cache generation
+        self._word_cache: "OrderedDict[Tuple[str, str], WordTranslation]" = OrderedDict()
+        self._word_cache_generation: Optional[int] = None
 
     async def translate(self, request: TranslateRequest) -> TranslateResponse:
         """
@@ -34,39 +60,15 @@ class TranslatorService:
         text = request.text.strip()
         direction = request.direction
 
-        # Tokenize
-        tokens = self._tokenize(text)
-
-        # Translate each token
-        word_translations = []
-        context_entries = []
-
-        for token in tokens:
-            if self._is_punctuation(token):
-                # Keep punctuation as-is
-                word_translations.append(WordTranslation(
-                    word=token,
-                    translations=[token],
-                    confidence=1.0
-                ))
-            else:
-                # Translate word
-                wt = await self._translate_word(token, direction)
-                word_translations.append(wt)
-
-                # Collect context for LLM
-                if not wt.is_unknown and wt.translations:
-                    context_entries.append({
-                        "word": wt.word,
-                        "translations": wt.translations
-                    })
+        word_translations, context_words, context_translations = await self._translate_words(text, direction)
 
         # Try LLM for better translation
         llm_used = False
-        if request.use_llm and context_entries:
+        if request.use_llm and context_words:
             llm_translation = await self.llm.translate(
                 text=text,
-                context=context_entries,
+                context_words=context_words,
+                context_translations=context_translations,
                 direction=direction.value
             )
             if llm_translation:
@@ -86,23 +88,173 @@ class TranslatorService:
             llm_used=llm_used
         )
 
-    async def _translate_word(
+    async def translate_stream(self, request: TranslateRequest) -> AsyncIterator[str]:
+        """
+        Translate text, yielding the LLM translation as it is generated.
+        Falls back to a single word-by-word chunk when the LLM is not used.
+        """
+        text = request.text.strip()
+
+        word_translations, context_words, context_translations = await self._translate_words(
+            text, request.direction
+        )
+
+        if request.use_llm and context_words:
+            streamed = False
+            async for chunk in self.llm.translate_stream(
+                text=text,
+                context_words=context_words,
+                context_translations=context_translations,
+                direction=request.direction.value
+            ):
+                streamed = True
+                yield chunk
+            if streamed:
+                return
+
+        yield self._assemble_translation(word_translations)
+
+    async def _translate_words(
+        self,
+        text: str,
+        direction: TranslationDirection
+    ) -> Tuple[List[WordTranslation], List[str], List[List[str]]]:
+        """
+        Translate each token and collect dictionary context for the LLM
+        as parallel lists of words and their translations
+        """
+        # Tokenize
+        tokens = self._tokenize(text)
+
+        word_tokens = [token for token in tokens if not self._is_punctuation(token)]
+
+        await self._sync_word_cache()
+
+        # Each distinct word is translated once, keyed by (casefolded word, direction)
+        distinct = {}
+        for token in word_tokens:
+            distinct.setdefault((token.casefold(), direction.value), token)
+
+        results = {}
+        missing = []
+        for key, token in distinct.items():
+            wt = self._translate_without_lookup(token, direction)
+            if wt is None:
+                wt = self._word_cache.get(key)
+                if wt is not None:
+                    self._word_cache.move_to_end(key)
+            if wt is None:
+                missing.append(token)
+            else:
+                results[key] = wt
+
+        if missing:
+            # Dictionary lookups block on the connection pool; run all of
+            # them for this request in one worker thread, off the event loop
+            translated = await anyio.to_thread.run_sync(self._translate_missing, missing, direction)
+            for token, wt in zip(missing, translated):
+                key = (token.casefold(), direction.value)
+                results[key] = wt
+                self._word_cache[key] = wt
+                if len(self._word_cache) > settings.WORD_TRANSLATION_CACHE_SIZE:
+                    self._word_cache.popitem(last=False)
+
+        translated = iter([
+            _with_spelling(results[(token.casefold(), direction.value)], token)
+            for token in word_tokens
+        ])
+
+        # Translate each token
+        word_translations = []
+        context_words = []
+        context_translations = []
+
+        for token in tokens:
+            if self._is_punctuation(token):
+                # Keep punctuation as-is
+                word_translations.append(WordTranslation(
+                    word=token,
+                    translations=[token],
+                    confidence=1.0
+                ))
+            else:
+                wt = next(translated)
+                word_translations.append(wt)
+
+                # Collect context for LLM; verbatim tokens tell it nothing
+                if not wt.is_unknown and wt.translations and not _is_verbatim(wt.word):
+                    context_words.append(wt.word)
+                    context_translations.append(wt.translations)
+
+        return word_translations, context_words, context_translations
+
+    async def _sync_word_cache(self):
+        """Forget memoized word translations once the dictionary has been reloaded"""
+        # Reading the generation may reload the word list from the database
+        generation = await anyio.to_thread.run_sync(lambda: self.dictionary.cache_generation)
+        if generation != self._word_cache_generation:
+            self._word_cache.clear()
+            self._word_cache_generation = generation
+
+    def _translate_without_lookup(
         self,
         word: str,
         direction: TranslationDirection
+    ) -> Optional[WordTranslation]:
+        """Translate words that need no dictionary lookup, else return None"""
+        # Numbers, Latin words and the like are kept as they are
+        if _is_verbatim(word):
+            return WordTranslation(word=word, translations=[word], confidence=1.0)
+
+        # Russian function words have no Tabasaran word to look up
+        if direction == TranslationDirection.RUS_TO_TAB and word.casefold() in _RUSSIAN_STOPWORDS:
+            return WordTranslation(
+                word=word,
+                translations=[word],
+                confidence=0.0,
+                is_unknown=True
+            )
+
+        return None
+
+    def _translate_missing(
+        self,
+        words: List[str],
+        direction: TranslationDirection
+    ) -> List[WordTranslation]:
+        """Translate words not memoized yet (runs in a worker thread)"""
+        # Resolve exact dictionary matches for all of them with one query
+        exact_matches = None
+        if direction == TranslationDirection.TAB_TO_RUS:
+            exact_matches = self.dictionary.lookup_exact_many(words)
+
+        return [self._translate_word(word, direction, exact_matches) for word in words]
+
+    def _translate_word(
+        self,
+        word: str,
+        direction: TranslationDirection,
+        exact_matches: Optional[Dict[str, List[DictionaryEntry]]] = None
     ) -> WordTranslation:
-        """Translate a single word"""
+        """Translate a single word, optionally with prefetched exact matches"""
 
         if direction == TranslationDirection.TAB_TO_RUS:
-            return await self._translate_tab_to_rus(word)
+            return self._translate_tab_to_rus(word, exact_matches)
         else:
-            return await self._translate_rus_to_tab(word)
+            return self._translate_rus_to_tab(word)
 
-    async def _translate_tab_to_rus(self, word: str) -> WordTranslation:
+    def _translate_tab_to_rus(
+        self,
+        word: str,
+        exact_matches: Optional[Dict[str, List[DictionaryEntry]]] = None
+    ) -> WordTranslation:
         """Translate Tabasaran word to Russian"""
 
         # 1. Try exact match
-        entries = self.dictionary.lookup_exact(word)
+        if exact_matches is not None and word in exact_matches:
+            entries = exact_matches[word]
+        else:
+            entries = self.dictionary.lookup_exact(word)
         if entries:
             entry = entries[0]
             return WordTranslation(
@@ -112,6 +264,15 @@ class TranslatorService:
                 confidence=1.0
             )
 
+        # Too short to analyze; fuzzy matching would accept almost anything
+        if len(word) < _MIN_ANALYZE_LENGTH:
+            return WordTranslation(
+                word=word,
+                translations=[word],
+                confidence=0.0,
+                is_unknown=True
+            )
+
         # 2. Try morphological analysis
         analysis = self.morphology.analyze(word)
         for possible_root in analysis.possible_roots:
@@ -126,8 +287,8 @@ class TranslatorService:
                         confidence=0.8  # Lower confidence for morphological match
                     )
 
-        # 3. Try fuzzy match
-        fuzzy_results = self.dictionary.lookup_fuzzy(word)
+        # 3. Try fuzzy match (allow about one edit per four letters)
+        fuzzy_results = self.dictionary.lookup_fuzzy(word, max_distance=max(1, len(word) // 4), limit=1)
         if fuzzy_results:
             entry, distance = fuzzy_results[0]
             confidence = max(0.3, 1.0 - (distance * 0.2))
@@ -146,7 +307,7 @@ class TranslatorService:
             is_unknown=True
         )
 
-    async def _translate_rus_to_tab(self, word: str) -> WordTranslation:
+    def _translate_rus_to_tab(self, word: str) -> WordTranslation:
         """Translate Russian word to Tabasaran"""
 
         entries = self.dictionary.search_russian(word)
@@ -169,13 +330,12 @@ class TranslatorService:
     def _tokenize(self, text: str) -> List[str]:
         """Split text into tokens (words and punctuation)"""
         # Split on word boundaries, keeping punctuation
-        pattern = r'(\s+|[.,!?;:"\'\(\)\[\]{}])'
-        tokens = re.split(pattern, text)
+        tokens = _TOKEN_RE.split(text)
         return [t for t in tokens if t and not t.isspace()]
 
     def _is_punctuation(self, token: str) -> bool:
         """Check if token is punctuation"""
-        return bool(re.match(r'^[.,!?;:"\'\(\)\[\]{}]+$', token))
+        return bool(token) and all(c in _PUNCT_SET for c in token)
 
     def _assemble_translation(self, word_translations: List[WordTranslation]) -> str:
         """Assemble translated words into text"""
@@ -189,9 +349,23 @@ class TranslatorService:
         # Simple assembly - join with spaces, fix punctuation spacing
         text = " ".join(parts)
         # Remove spaces before punctuation
-        text = re.sub(r'\s+([.,!?;:])', r'\1', text)
+        text = _FIX_PUNCT_RE.sub(r'\1', text)
         return text
 
 
+def _with_spelling(wt: WordTranslation, word: str) -> WordTranslation:
+    """Copy a translation made for another spelling of the same word"""
+    update = {"word": word}
+    if wt.is_unknown or _is_verbatim(word):
+        # These keep the original word as their translation
+        update["translations"] = [word]
+    return wt.model_copy(update=update)
+
+
+def _is_verbatim(word: str) -> bool:
+    """Check if token has no Cyrillic letter and is kept untranslated"""
+    return not _CYRILLIC_RE.search(word)
+
+
 # Singleton instance
 translator_service = TranslatorService()
@@ -18,6 +18,9 @@ import os
 import sys
 import re
 import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import List, Tuple, Optional
 
@@ -25,7 +28,7 @@ from typing import List, Tuple, Optional
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     from PIL import Image
     import pytesseract
 except ImportError as e:
@@ -33,22 +36,47 @@ except ImportError as e:
     print("Install with: pip install pdf2image pytesseract Pillow")
     sys.exit(1)
 
+try:
+    import orjson  # Faster JSON output; the standard library is used without it
+except ImportError:
+    orjson = None
+
 
 # Configuration
 POPPLER_PATH = None  # Set if not in PATH, e.g., r"C:\poppler\bin"
 TESSERACT_CMD = None  # Set if not in PATH, e.g., r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+DPI = 300  # Resolution for rendering PDF pages
+HIGH_DPI = 400  # Resolution for pages that yield too few entries at DPI
+MIN_PAGE_ENTRIES = 5  # Fewer entries than this triggers a HIGH_DPI retry
+OCR_LANG = "rus"
+# LSTM engine, assume uniform block of text, keep spacing within lines
+OCR_CONFIG = r'--oem 3 --psm 6 -c preserve_interword_spaces=1'
 
 # Paths
 CONTENT_DIR = Path(__file__).parent.parent / "content"
 OUTPUT_DIR = Path(__file__).parent.parent / "backend" / "data"
 DICTIONARY_PDF = CONTENT_DIR / "Табасаранско-русский словарь.pdf"
+CACHE_DIR = OUTPUT_DIR / "ocr_cache"  # Rendered pages and OCR text
 
+# Binarization lookup table: pixels brighter than the threshold become white
+THRESHOLD = 180
+THRESHOLD_LUT = [255 if x > THRESHOLD else 0 for x in range(256)]
 
-def setup_tesseract():
-    """Configure Tesseract path"""
+# Dictionary entry: word followed by dash and translation, one per line
+ENTRY_RE = re.compile(r'^[^\S\n]*([А-Яа-яӀ]+)[^\S\n]*[—–-][^\S\n]*(\S.*)$', re.MULTILINE)
+TRANS_SPLIT_RE = re.compile(r'\s*;\s*')
+
+
+def set_tesseract_cmd():
+    """Point pytesseract at the configured Tesseract binary"""
     if TESSERACT_CMD:
         pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
+
+def setup_tesseract():
+    """Configure Tesseract path"""
+    set_tesseract_cmd()
+
     # Test Tesseract
     try:
         version = pytesseract.get_tesseract_version()
@@ -59,45 +87,98 @@ def setup_tesseract():
         sys.exit(1)
 
 
-def pdf_to_images(pdf_path: Path, dpi: int = 400) -> List[Image.Image]:
-    """Convert PDF pages to images"""
-    print(f"Converting PDF to images (DPI={dpi})...")
+def init_worker():
+    """Prepare an OCR worker process"""
+    set_tesseract_cmd()
+    # Pages already run in parallel; keep each Tesseract single-threaded
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def pdf_digest(pdf_path: Path) -> str:
+    """Short hash identifying the PDF contents"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
 
-    kwargs = {"dpi": dpi}
-    if POPPLER_PATH:
-        kwargs["poppler_path"] = POPPLER_PATH
+def cache_prefix_for(pdf_id: str, dpi: int = DPI) -> str:
+    """Cache file prefix for a PDF (by digest) rendered at a resolution"""
+    return f"{pdf_id}_dpi{dpi}"
 
+
+def pdf_cache_prefix(pdf_path: Path, dpi: int = DPI) -> str:
+    """Cache file prefix identifying the PDF contents and render resolution"""
+    return cache_prefix_for(pdf_digest(pdf_path), dpi)
+
+
+def page_image_path(cache_prefix: str, page_num: int) -> Path:
+    """Path of a cached page image"""
+    return CACHE_DIR / f"{cache_prefix}_p{page_num}.png"
+
+
+def poppler_kwargs() -> dict:
+    """Extra pdf2image arguments for the configured Poppler"""
+    return {"poppler_path": POPPLER_PATH} if POPPLER_PATH else {}
+
+
+def pdf_page_count(pdf_path: Path) -> int:
+    """Get number of pages in PDF"""
     try:
-        images = convert_from_path(str(pdf_path), **kwargs)
-        print(f"Converted {len(images)} pages")
-        return images
+        return pdfinfo_from_path(str(pdf_path), **poppler_kwargs())["Pages"]
     except Exception as e:
-        print(f"Error converting PDF: {e}")
+        print(f"Error reading PDF: {e}")
         print("Make sure Poppler is installed and in PATH")
         sys.exit(1)
 
 
+def render_page(pdf_path: Path, page_num: int, cache_prefix: str, dpi: int = DPI) -> Path:
+    """Render a single PDF page into the cache unless already there"""
+    path = page_image_path(cache_prefix, page_num)
+
+    if not path.exists():
+        # Only this page is converted, so one bitmap is in memory at a time
+        image = convert_from_path(
+            str(pdf_path),
+            dpi=dpi,
+            first_page=page_num,
+            last_page=page_num,
+            **poppler_kwargs()
+        )[0]
+
+        # Write under a temporary name so an interrupted run leaves no partial file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        image.save(tmp_path, format="PNG")
+        tmp_path.replace(path)
+
+    return path
+
+
 def preprocess_image(image: Image.Image) -> Image.Image:
     """Preprocess image for better OCR"""
     # Convert to grayscale
     gray = image.convert('L')
 
-    # Simple thresholding for better contrast
-    threshold = 180
-    binary = gray.point(lambda x: 255 if x > threshold else 0, '1')
+    # Simple thresholding for better contrast (table lookup runs in C)
+    binary = gray.point(THRESHOLD_LUT, '1')
 
     return binary
 
 
-def ocr_image(image: Image.Image, lang: str = "rus") -> str:
+def ocr_image(image: Image.Image, lang: str = OCR_LANG) -> str:
     """Run OCR on image"""
-    # OCR configuration
-    config = r'--oem 3 --psm 6'  # LSTM engine, assume uniform block of text
-
-    text = pytesseract.image_to_string(image, lang=lang, config=config)
+    text = pytesseract.image_to_string(image, lang=lang, config=OCR_CONFIG)
     return text
 
 
+def ocr_cache_tag() -> str:
+    """Short hash of the OCR settings, so changing them invalidates cached text"""
+    settings = f"{OCR_LANG}\n{OCR_CONFIG}\nthreshold={THRESHOLD}"
+    return hashlib.sha256(settings.encode()).hexdigest()[:8]
+
+
 def extract_dictionary_entries(text: str) -> List[dict]:
     """
     Parse OCR text to extract dictionary entries.
@@ -106,69 +187,77 @@ def extract_dictionary_entries(text: str) -> List[dict]:
     ТАБАСАРАНСКОЕ_СЛОВО — русский перевод; другое значение
     """
     entries = []
-
-    # Split into lines
-    lines = text.split('\n')
-
     current_entry = None
+    pos = 0
 
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        # Try to match dictionary entry pattern
-        # Pattern: word followed by dash and translation
-        match = re.match(r'^([А-Яа-яӀ]+)\s*[—–-]\s*(.+)$', line)
-
-        if match:
-            # Save previous entry
-            if current_entry:
-                entries.append(current_entry)
-
-            word = match.group(1).strip()
-            translation = match.group(2).strip()
+    for match in ENTRY_RE.finditer(text):
+        # Lines between two entries continue the previous one
+        if current_entry:
+            add_continuation(current_entry, text[pos:match.start()])
+            entries.append(current_entry)
+        pos = match.end()
 
+        current_entry = {
+            'word': match.group(1),
             # Parse translations (separated by ;)
-            translations = [t.strip() for t in translation.split(';') if t.strip()]
-
-            current_entry = {
-                'word': word,
-                'translations': translations,
-                'raw_line': line
-            }
-        elif current_entry and line:
-            # Continuation of previous entry
-            current_entry['translations'].extend(
-                [t.strip() for t in line.split(';') if t.strip()]
-            )
+            'translations': split_translations(match.group(2)),
+            'raw_line': match.group(0).strip()
+        }
 
     # Don't forget last entry
     if current_entry:
+        add_continuation(current_entry, text[pos:])
         entries.append(current_entry)
 
     return entries
 
 
+def split_translations(text: str) -> List[str]:
+    """Split a translation string on ';' dropping empty parts"""
+    return [t for t in TRANS_SPLIT_RE.split(text.strip()) if t]
+
+
+def add_continuation(entry: dict, text: str):
+    """Append translations from lines that continue an entry"""
+    for line in text.split('\n'):
+        entry['translations'].extend(split_translations(line))
+
+
 def save_entries(entries: List[dict], output_path: Path):
     """Save extracted entries to JSON"""
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(entries, f, ensure_ascii=False, indent=2)
+    if orjson:
+        output_path.write_bytes(orjson.dumps(entries, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
 
     print(f"Saved {len(entries)} entries to {output_path}")
 
 
-def process_single_page(image: Image.Image, page_num: int) -> List[dict]:
-    """Process a single page"""
+def process_single_page(image: Image.Image, page_num: int, cache_prefix: Optional[str] = None) -> List[dict]:
+    """Process a single page, reusing cached OCR text when available"""
     print(f"Processing page {page_num}...")
 
-    # Preprocess
-    processed = preprocess_image(image)
+    text_path = CACHE_DIR / f"{cache_prefix}_ocr{ocr_cache_tag()}_p{page_num}.txt" if cache_prefix else None
 
-    # OCR
-    text = ocr_image(processed)
+    if text_path and text_path.exists():
+        text = text_path.read_text(encoding='utf-8')
+    else:
+        # Preprocess
+        processed = preprocess_image(image)
+
+        # OCR, then drop the bitmap before parsing
+        text = ocr_image(processed)
+        del processed
+
+        if text_path:
+            # Write under a temporary name so an interrupted run leaves no partial file
+            text_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = text_path.with_name(text_path.name + ".tmp")
+            tmp_path.write_text(text, encoding='utf-8')
+            tmp_path.replace(text_path)
 
     # Extract entries
     entries = extract_dictionary_entries(text)
@@ -177,6 +266,28 @@ def process_single_page(image: Image.Image, page_num: int) -> List[dict]:
     return entries
 
 
+def process_pdf_page(pdf_path: Path, page_num: int, pdf_id: str) -> List[dict]:
+    """Render (if needed) and process one page (runs in a worker process)"""
+    entries = process_pdf_page_at(pdf_path, page_num, pdf_id, DPI)
+
+    # Few entries usually means small print the lower resolution lost
+    if len(entries) < MIN_PAGE_ENTRIES and HIGH_DPI > DPI:
+        print(f"  Retrying page {page_num} at {HIGH_DPI} DPI")
+        retried = process_pdf_page_at(pdf_path, page_num, pdf_id, HIGH_DPI)
+        if len(retried) > len(entries):
+            entries = retried
+
+    return entries
+
+
+def process_pdf_page_at(pdf_path: Path, page_num: int, pdf_id: str, dpi: int) -> List[dict]:
+    """Render (if needed) and process one page at the given resolution"""
+    cache_prefix = cache_prefix_for(pdf_id, dpi)
+    # Closing the image frees its bitmap before the worker takes the next page
+    with Image.open(render_page(pdf_path, page_num, cache_prefix, dpi)) as image:
+        return process_single_page(image, page_num, cache_prefix)
+
+
 def main():
     """Main extraction process"""
     print("=" * 60)
@@ -192,18 +303,27 @@ def main():
         print(f"Dictionary PDF not found: {DICTIONARY_PDF}")
         sys.exit(1)
 
-    # Convert to images
-    images = pdf_to_images(DICTIONARY_PDF)
+    # Pages and OCR text are cached per PDF and DPI
+    pdf_id = pdf_digest(DICTIONARY_PDF)
+    page_count = pdf_page_count(DICTIONARY_PDF)
+    print(f"Processing {page_count} pages (DPI={DPI}, sparse pages retried at {HIGH_DPI})...")
 
-    # Process each page
+    # Render and OCR pages in parallel; map() yields results in page order
     all_entries = []
-    for i, image in enumerate(images, 1):
-        entries = process_single_page(image, i)
-        all_entries.extend(entries)
-
-        # Save intermediate results every 50 pages
-        if i % 50 == 0:
-            save_entries(all_entries, OUTPUT_DIR / f"dictionary_partial_{i}.json")
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=init_worker) as executor:
+        results = executor.map(
+            process_pdf_page,
+            repeat(DICTIONARY_PDF),
+            range(1, page_count + 1),
+            repeat(pdf_id),
+            chunksize=4
+        )
+        for i, entries in enumerate(results, 1):
+            all_entries.extend(entries)
+
+            # Save intermediate results every 50 pages
+            if i % 50 == 0:
+                save_entries(all_entries, OUTPUT_DIR / f"dictionary_partial_{i}.json")
 
     # Save final result
     save_entries(all_entries, OUTPUT_DIR / "dictionary_raw.json")
@@ -220,14 +340,15 @@ def test_ocr_single_page(page_num: int = 10):
 
     setup_tesseract()
 
-    images = pdf_to_images(DICTIONARY_PDF)
+    page_count = pdf_page_count(DICTIONARY_PDF)
 
-    if page_num > len(images):
-        print(f"Only {len(images)} pages in PDF")
+    if page_num > page_count:
+        print(f"Only {page_count} pages in PDF")
         return
 
-    image = images[page_num - 1]
-    processed = preprocess_image(image)
+    # Render just the requested page
+    with Image.open(render_page(DICTIONARY_PDF, page_num, pdf_cache_prefix(DICTIONARY_PDF))) as image:
+        processed = preprocess_image(image)
 
     # Save processed image for inspection
     processed.save(OUTPUT_DIR / f"test_page_{page_num}.png")
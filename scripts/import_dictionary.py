@@ -6,10 +6,15 @@ import sys
 import json
 from pathlib import Path
 
+try:
+    import orjson  # Faster JSON parsing; the standard library is used without it
+except ImportError:
+    orjson = None
+
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
-from app.database import init_db, get_db, normalize_word
+from app.database import init_db, get_db, bulk_load, normalize_word
 from app.config import settings
 
 
@@ -20,65 +25,71 @@ def import_from_json(json_path: Path):
     """Import dictionary entries from JSON file"""
     print(f"Importing from {json_path}...")
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        entries = json.load(f)
+    if orjson:
+        entries = orjson.loads(json_path.read_bytes())
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
 
     print(f"Found {len(entries)} entries")
 
     # Initialize database
     init_db()
 
-    imported = 0
+    # Clean entries up front: (word, [(translation, priority), ...])
+    rows = []
     skipped = 0
 
-    with get_db() as conn:
-        cursor = conn.cursor()
+    for entry in entries:
+        word = entry.get('word', '').strip()
+        translations = entry.get('translations', [])
 
-        for entry in entries:
-            word = entry.get('word', '').strip()
-            translations = entry.get('translations', [])
+        if not word or not translations:
+            skipped += 1
+            continue
 
-            if not word or not translations:
-                skipped += 1
-                continue
+        rows.append((word, [
+            (translation.strip(), len(translations) - i)
+            for i, translation in enumerate(translations)
+            if translation.strip()
+        ]))
 
-            # Check if word already exists
-            cursor.execute("SELECT id FROM words WHERE word = ?", (word,))
-            existing = cursor.fetchone()
+    imported = len(rows)
 
-            if existing:
-                word_id = existing['id']
-            else:
-                # Insert new word
-                cursor.execute("""
-                    INSERT INTO words (word, word_normalized)
-                    VALUES (?, ?)
-                """, (word, normalize_word(word)))
-                word_id = cursor.lastrowid
+    # Normalize every distinct word before the transaction starts
+    word_rows = [(word, normalize_word(word)) for word in dict.fromkeys(word for word, _ in rows)]
 
-            # Insert translations
-            for i, translation in enumerate(translations):
-                translation = translation.strip()
-                if translation:
-                    # Check if translation exists
-                    cursor.execute("""
-                        SELECT id FROM translations
-                        WHERE word_id = ? AND translation = ?
-                    """, (word_id, translation))
-
-                    if not cursor.fetchone():
-                        cursor.execute("""
-                            INSERT INTO translations (word_id, translation, priority)
-                            VALUES (?, ?, ?)
-                        """, (word_id, translation, len(translations) - i))
-
-            imported += 1
-
-            if imported % 1000 == 0:
-                print(f"  Imported {imported} entries...")
-                conn.commit()
+    # One transaction for the whole import, committed at the end
+    with bulk_load() as conn:
+        cursor = conn.cursor()
 
-        conn.commit()
+        # Insert words that are not in the database yet
+        cursor.execute("SELECT word FROM words")
+        existing_words = {row['word'] for row in cursor.fetchall()}
+        new_words = [row for row in word_rows if row[0] not in existing_words]
+        cursor.executemany("""
+            INSERT INTO words (word, word_normalized)
+            VALUES (?, ?)
+        """, new_words)
+        print(f"  Inserted {len(new_words)} new words")
+
+        # Map every word to its (first) id
+        word_ids = {}
+        cursor.execute("SELECT id, word FROM words ORDER BY id")
+        for row in cursor.fetchall():
+            word_ids.setdefault(row['word'], row['id'])
+
+        # Insert translations; the unique index skips ones the word already has
+        trans_rows = [
+            (word_ids[word], translation, priority)
+            for word, translations in rows
+            for translation, priority in translations
+        ]
+        cursor.executemany("""
+            INSERT OR IGNORE INTO translations (word_id, translation, priority)
+            VALUES (?, ?, ?)
+        """, trans_rows)
+        print(f"  Inserted {cursor.rowcount} new translations")
 
     print(f"Import complete!")
     print(f"  Imported: {imported}")
@@ -114,17 +125,19 @@ def import_sample_data():
         {"word": "кату", "translations": ["кошка"]},
     ]
 
+    normalized = [normalize_word(entry['word']) for entry in sample_entries]
+
     with get_db() as conn:
         cursor = conn.cursor()
 
-        for entry in sample_entries:
+        for entry, word_normalized in zip(sample_entries, normalized):
             word = entry['word']
             translations = entry['translations']
 
             cursor.execute("""
                 INSERT OR IGNORE INTO words (word, word_normalized)
                 VALUES (?, ?)
-            """, (word, normalize_word(word)))
+            """, (word, word_normalized))
 
             cursor.execute("SELECT id FROM words WHERE word = ?", (word,))
             word_id = cursor.fetchone()['id']